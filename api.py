@@ -5,100 +5,272 @@ It includes functions for searching entries, retrieving specific entries, and fe
 import sqlite3
 import os
 import re
+import atexit
+import time
+import queue
+from collections import defaultdict
+from random import randint
 from unidecode import unidecode
-from functools import wraps
-from typing import Optional, List, Dict, Any
+from functools import wraps, lru_cache
+from typing import Optional, List, Dict, Any, Tuple
 
+# The queries rely on the indexes added by create_indexes.py
 DB_PATH = os.path.join(os.path.dirname(
     os.path.realpath(__file__)), 'db', 'roms.db')
+POOL_SIZE = os.cpu_count() or 4
+CONNECTION_PRAGMAS = {
+    'query_only': 1,
+    'cache_size': -65536,  # 64 MiB page cache
+    'mmap_size': 268435456,  # 256 MiB memory-mapped I/O
+    'temp_store': 'memory'
+}
+COUNT_CACHE_SIZE = 4096
+SEARCH_KEY_CACHE_SIZE = 4096
+FETCH_SIZE = 32
+QUERY_CACHE_SIZE = 256
+INFO_TTL = 60  # Seconds
+
+# Keys of the rows selected from the entries and links tables, in selection order
+ENTRY_COLUMNS = ('slug', 'rom_id', 'title', 'platform', 'boxart_url')
+LINK_COLUMNS = ('name', 'type', 'format', 'url', 'filename',
+                'host', 'size', 'size_str', 'source_url')
+
+# The database is read-only, so counts stay valid for the life of the process
+_count_cache: Dict[Tuple[Any, ...], int] = {}
+_max_rowid: Optional[int] = None
+_info_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+
+
+SPACES_RE = re.compile(r' +')
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+INVALID_CHARS_TABLE = str.maketrans({
+    '+': ' plus ',
+    '&': ' and ',
+    '™': ' ',
+    '©': ' ',
+    '®': ' '
+})
 
 
 def normalize_repeated_chars(text: str, char: str) -> str:
     """Replace consecutive occurrences of a character with a single instance."""
-    escaped_char = re.escape(char)  # Escape special characters for regex
-    return re.sub(f'{escaped_char}+', char, text).strip()
+    if char == ' ':
+        pattern = SPACES_RE
+    else:
+        pattern = re.compile(f'{re.escape(char)}+')  # Escape special characters for regex
+    return pattern.sub(char, text).strip()
 
 
 def replace_invalid_chars(title: str) -> str:
     """Replace invalid characters in a string with valid substitutes."""
-    for value1, value2 in {
-        '+': 'plus',
-        '&': 'and',
-        '™': '',
-        '©': '',
-        '®': ''
-    }.items():
-        title = title.replace(value1, f' {value2} ')
-    return title
+    return title.translate(INVALID_CHARS_TABLE)
 
 
+@lru_cache(maxsize=SEARCH_KEY_CACHE_SIZE)
 def get_valid_search_key(search_key: str) -> str:
     """Process the input search key by performing a series of transformations to ensure it is valid."""
     search_key = replace_invalid_chars(search_key)
-    search_key = unidecode(search_key)
+    if not search_key.isascii():
+        search_key = unidecode(search_key)
     search_key = normalize_repeated_chars(search_key, ' ')
     search_key = search_key.strip()
     return search_key
 
 
+@lru_cache(maxsize=SEARCH_KEY_CACHE_SIZE)
 def create_db_search_key(title: str) -> str:
     """Create a search key by transforming a string using the same format used in the database"""
-    title = get_valid_search_key(title)
-    title = title.lower()
-    title = re.sub(r"[^a-z0-9]", '', title)
-    title = title.strip()
-    return title
+    return NON_ALNUM_RE.sub('', get_valid_search_key(title).lower())
 
 
+@lru_cache(maxsize=SEARCH_KEY_CACHE_SIZE)
 def prepare_search_key(search_key: str) -> str:
     """Make the given string safe for use in a SQL MATCH operator."""
+    if search_key.isalnum():  # Single word with no whitespace or quotes to handle
+        return f'"{search_key}"'
     words = search_key.split()
     escaped_words = [word.replace('"', r'""') for word in words]
     quoted_words = [f'"{word}"' for word in escaped_words]
     return ' '.join(quoted_words)
 
 
+def create_connection() -> sqlite3.Connection:
+    """Open a read-only database connection that can be shared across threads and tune it for reading."""
+    con = sqlite3.connect(f'file:{DB_PATH}?mode=ro',
+                          uri=True, check_same_thread=False)
+    for pragma, value in CONNECTION_PRAGMAS.items():
+        con.execute(f'PRAGMA {pragma} = {value}')
+    return con
+
+
+_POOL: queue.Queue = queue.Queue(maxsize=POOL_SIZE)
+for _ in range(POOL_SIZE):
+    _POOL.put(create_connection())
+
+
+@atexit.register
+def close_pool() -> None:
+    """Close all the pooled database connections."""
+    while True:
+        try:
+            _POOL.get_nowait().close()
+        except queue.Empty:
+            break
+
+
 def with_db(func):
-    """Decorator that provides a read-only database connection and cursor to a function."""
+    """Decorator that provides a pooled read-only database cursor to a function."""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        con = sqlite3.connect(f'file:{DB_PATH}?mode=ro', uri=True)
-        con.row_factory = sqlite3.Row
+        con = _POOL.get()
         cur = con.cursor()
         try:
             result = func(cur, *args, **kwargs)
         finally:
             cur.close()
-            con.close()
+            _POOL.put(con)
         return result
     return wrapper
 
 
+_EMPTY: Dict[str, Any] = {}  # Shared by responses, must never be mutated
+
+
 def build_response(info: Optional[Dict[str, Any]] = None, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Build the universal response structure used in the API."""
     return {
-        'info': info or {},
-        'data': data or {}
+        'info': _EMPTY if info is None else info,
+        'data': _EMPTY if data is None else data
     }
 
 
+# Prebuilt error responses, shared between requests and never mutated
+ERROR_DB_OPERATION = build_response({'error': "Database operation failed"})
+ERROR_DB = build_response({'error': "A database error occurred"})
+ERROR_INVALID_INPUT = build_response({'error': "Invalid input provided"})
+ERROR_UNEXPECTED = build_response({'error': "An unexpected error occurred"})
+ERROR_RESPONSES = {
+    sqlite3.OperationalError: ERROR_DB_OPERATION,
+    sqlite3.DatabaseError: ERROR_DB,
+    ValueError: ERROR_INVALID_INPUT
+}
+
+
 def handle_exception(func):
     """Decorator that handles exceptions for all API endpoints."""
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except sqlite3.OperationalError:
-            return build_response({'error': "Database operation failed"})
-        except sqlite3.DatabaseError:
-            return build_response({'error': "A database error occurred"})
-        except ValueError:
-            return build_response({'error': "Invalid input provided"})
-        except Exception:
-            return build_response({'error': "An unexpected error occurred"})
+        except Exception as e:
+            # Walk the MRO so subclasses get the response of their closest mapped base
+            for exception_type in type(e).__mro__:
+                response = ERROR_RESPONSES.get(exception_type)
+                if response is not None:
+                    return response
+            return ERROR_UNEXPECTED
     return wrapper
 
 
+def add_entries_details(cur: sqlite3.Cursor, entries: List[Dict[str, Any]]) -> None:
+    """Add the regions and links of each given entry, fetching them all at once."""
+    if not entries:
+        return
+
+    slugs = [entry['slug'] for entry in entries]
+    placeholders = ','.join(['?' for _ in slugs])
+
+    regions_by_slug = defaultdict(list)
+    cur.execute(f"""
+        SELECT entry, region FROM regions_entries
+        WHERE entry IN ({placeholders})
+    """, slugs)
+    for slug, region in cur.fetchall():
+        regions_by_slug[slug].append(region)
+
+    links_by_slug = defaultdict(list)
+    cur.execute(f"""
+        SELECT entry, name, type, format, url, filename, host, size, size_str, source_url
+        FROM links
+        WHERE entry IN ({placeholders})
+    """, slugs)
+    for slug, *link in cur.fetchall():
+        links_by_slug[slug].append(dict(zip(LINK_COLUMNS, link)))
+
+    for entry in entries:
+        entry['regions'] = regions_by_slug[entry['slug']]
+        entry['links'] = links_by_slug[entry['slug']]
+
+
+def count_results(cur: sqlite3.Cursor, count_query: str, params: List[Any]) -> int:
+    """Run a count query, reusing the result of previous identical queries."""
+    key = (count_query, *params)
+    total_results = _count_cache.get(key)
+    if total_results is None:
+        cur.execute(count_query, params)
+        total_results = cur.fetchone()[0]
+        if len(_count_cache) >= COUNT_CACHE_SIZE:
+            _count_cache.clear()
+        _count_cache[key] = total_results
+    return total_results
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def build_search_queries(has_search_key: bool, platforms_count: int, regions_count: int, has_rom_id: bool) -> Tuple[str, str]:
+    """Build the count and paginated search queries for the given shape of filters."""
+    # Parameters are bound in the order: search key, platforms, regions, rom_id
+    with_clause = ""
+    base_query = """
+    SELECT e.slug, e.rom_id, e.title, e.platform, e.boxart_url
+    FROM entries e
+    """
+    where_clauses = []
+
+    if has_search_key:
+        # Match against the FTS table alone so the planner keeps the FTS index
+        # instead of mixing MATCH with the filters on the joined tables
+        with_clause = """
+        WITH fts_matches AS (
+            SELECT rowid, search_key, bm25(entries_fts) AS rank FROM entries_fts
+            WHERE search_key MATCH ?
+        )
+        """
+        base_query += " JOIN fts_matches fts ON fts.rowid = e.rowid "
+
+    if platforms_count:
+        placeholders = ','.join(['?'] * platforms_count)
+        where_clauses.append(f"e.platform IN ({placeholders})")
+
+    if regions_count:
+        # Entries without regions are always included
+        placeholders = ','.join(['?'] * regions_count)
+        where_clauses.append(f"""(
+            e.slug IN (SELECT entry FROM regions_entries WHERE region IN ({placeholders}))
+            OR NOT EXISTS (SELECT 1 FROM regions_entries WHERE entry = e.slug)
+        )""")
+
+    if has_rom_id:
+        where_clauses.append("e.rom_id = ?")
+
+    if where_clauses:
+        base_query += " WHERE " + " AND ".join(where_clauses)
+
+    if has_search_key and not where_clauses:
+        # Nothing is filtered out of the matches, so the FTS index alone can count them
+        count_query = "SELECT COUNT(*) FROM entries_fts WHERE search_key MATCH ?"
+    else:
+        count_query = f"{with_clause} SELECT COUNT(*) FROM ({base_query})"
+
+    if has_search_key:
+        # Keys are stored already normalized, so prefix matches are a plain comparison
+        final_query = with_clause + base_query + \
+            " ORDER BY (substr(fts.search_key, 1, ?) = ?) DESC, fts.rank LIMIT ? OFFSET ?"
+    else:
+        final_query = base_query + " LIMIT ? OFFSET ?"
+
+    return count_query, final_query
+
+
 @with_db
 @handle_exception
 def get_search(
@@ -117,43 +289,17 @@ def get_search(
     max_results = max(1, min(max_results, 100))
     page = max(1, page)  # Ensure page is at least 1
 
-    base_query = """
-    SELECT DISTINCT e.slug, e.rom_id, e.title, e.platform, e.boxart_url
-    FROM entries e
-    """
-    where_clauses = []
     params = []
-
     if search_key:
-        prepared_search_key = prepare_search_key(search_key)
-        base_query += " JOIN entries_fts fts ON fts.rowid = e.rowid "
-        where_clauses.append("fts.search_key MATCH ?")
-        params.append(prepared_search_key)
-
-    if platforms:
-        placeholders = ','.join(['?' for _ in platforms])
-        where_clauses.append(f"e.platform IN ({placeholders})")
-        params.extend(platforms)
-
-    if regions:
-        base_query += """
-        LEFT JOIN regions_entries re ON re.entry = e.slug
-        """
-        where_clauses.append("(re.region IN ({}) OR re.region IS NULL)".format(
-            ','.join(['?' for _ in regions])
-        ))
-        params.extend(regions)
-
+        params.append(prepare_search_key(search_key))
+    params.extend(platforms)
+    params.extend(regions)
     if rom_id:
-        where_clauses.append("e.rom_id = ?")
         params.append(rom_id)
 
-    if where_clauses:
-        base_query += " WHERE " + " AND ".join(where_clauses)
-
-    count_query = f"SELECT COUNT(*) FROM ({base_query})"
-    cur.execute(count_query, params)
-    total_results = cur.fetchone()[0]
+    count_query, final_query = build_search_queries(
+        bool(search_key), len(platforms), len(regions), bool(rom_id))
+    total_results = count_results(cur, count_query, params)
 
     total_pages = (total_results + max_results -
                    1) // max_results if max_results > 0 else 1
@@ -162,33 +308,17 @@ def get_search(
 
     if search_key:
         db_search_key = create_db_search_key(search_key)
-        final_query = base_query + \
-            f" ORDER BY (fts.search_key LIKE ? || '%') DESC LIMIT ? OFFSET ?"
-        params_with_pagination = params + [db_search_key, max_results, offset]
+        params_with_pagination = params + \
+            [len(db_search_key), db_search_key, max_results, offset]
     else:
-        final_query = base_query + " LIMIT ? OFFSET ?"
         params_with_pagination = params + [max_results, offset]
 
+    cur.arraysize = FETCH_SIZE
     cur.execute(final_query, params_with_pagination)
     results = []
-
-    for row in cur.fetchall():
-        entry = dict(row)
-
-        cur.execute("""
-            SELECT region FROM regions_entries
-            WHERE entry = ?
-        """, (entry['slug'],))
-        entry['regions'] = [region[0] for region in cur.fetchall()]
-
-        cur.execute("""
-            SELECT name, type, format, url, filename, host, size, size_str, source_url
-            FROM links
-            WHERE entry = ?
-        """, (entry['slug'],))
-        entry['links'] = [dict(link_row) for link_row in cur.fetchall()]
-
-        results.append(entry)
+    while rows := cur.fetchmany():
+        results.extend(dict(zip(ENTRY_COLUMNS, row)) for row in rows)
+    add_entries_details(cur, results)
 
     return build_response(
         {},
@@ -202,21 +332,35 @@ def get_search(
     )
 
 
+def get_max_rowid(cur: sqlite3.Cursor) -> Optional[int]:
+    """Get the highest rowid of the entries, querying it only once."""
+    global _max_rowid
+    if _max_rowid is None:
+        cur.execute("SELECT MAX(rowid) FROM entries")
+        _max_rowid = cur.fetchone()[0]
+    return _max_rowid
+
+
 @with_db
 @handle_exception
 def get_entry(cur: sqlite3.Cursor, slug: Optional[str] = None, random: bool = False) -> Dict[str, Any]:
     """Select an entry directly by its slug or get a random entry."""
     if random:
+        max_rowid = get_max_rowid(cur)
+        if max_rowid is None:
+            return build_response()
+        # Seek to the first entry at or after a random rowid instead of sorting the whole table
         cur.execute("""
             SELECT slug, rom_id, title, platform, boxart_url
             FROM entries
-            ORDER BY RANDOM()
+            WHERE rowid >= ?
+            ORDER BY rowid
             LIMIT 1
-        """)
+        """, (randint(1, max_rowid),))
         row = cur.fetchone()
         if not row:
             return build_response()
-        entry = dict(row)
+        entry = dict(zip(ENTRY_COLUMNS, row))
     else:
         if not slug:
             return build_response({'error': 'Slug is required'})
@@ -228,28 +372,16 @@ def get_entry(cur: sqlite3.Cursor, slug: Optional[str] = None, random: bool = Fa
         row = cur.fetchone()
         if not row:
             return build_response({'error': 'Entry not found'})
-        entry = dict(row)
-
-    cur.execute("""
-        SELECT region FROM regions_entries
-        WHERE entry = ?
-    """, (entry['slug'],))
-    entry['regions'] = [region[0] for region in cur.fetchall()]
+        entry = dict(zip(ENTRY_COLUMNS, row))
 
-    cur.execute("""
-        SELECT name, type, format, url, filename, host, size, size_str, source_url
-        FROM links
-        WHERE entry = ?
-    """, (entry['slug'],))
-    entry['links'] = [dict(link_row) for link_row in cur.fetchall()]
+    add_entries_details(cur, [entry])
 
     return build_response({}, {'entry': entry})
 
 
 @with_db
-@handle_exception
-def get_platforms(cur: sqlite3.Cursor) -> Dict[str, Any]:
-    """Get the available platforms in the database."""
+def load_platforms(cur: sqlite3.Cursor) -> Dict[str, Any]:
+    """Load the available platforms in the database."""
     cur.execute("""
         SELECT id, brand, name
         FROM platforms
@@ -260,9 +392,8 @@ def get_platforms(cur: sqlite3.Cursor) -> Dict[str, Any]:
 
 
 @with_db
-@handle_exception
-def get_regions(cur: sqlite3.Cursor) -> Dict[str, Any]:
-    """Get the available regions in the database."""
+def load_regions(cur: sqlite3.Cursor) -> Dict[str, Any]:
+    """Load the available regions in the database."""
     cur.execute("""
         SELECT id, name
         FROM regions
@@ -271,10 +402,38 @@ def get_regions(cur: sqlite3.Cursor) -> Dict[str, Any]:
     return build_response({}, {'regions': regions})
 
 
+# Platforms and regions never change at runtime, so their responses are built once
+_PLATFORMS_RESPONSE = load_platforms()
+_REGIONS_RESPONSE = load_regions()
+
+
+def get_platforms() -> Dict[str, Any]:
+    """Get the available platforms in the database."""
+    return _PLATFORMS_RESPONSE
+
+
+def get_regions() -> Dict[str, Any]:
+    """Get the available regions in the database."""
+    return _REGIONS_RESPONSE
+
+
 @with_db
 @handle_exception
-def get_info(cur: sqlite3.Cursor) -> Dict[str, Any]:
-    """Get information on the current state of the database."""
+def load_info(cur: sqlite3.Cursor) -> Dict[str, Any]:
+    """Load information on the current state of the database."""
     cur.execute("SELECT COUNT(*) FROM entries")
     total_entries = cur.fetchone()[0]
     return build_response({}, {'total_entries': total_entries})
+
+
+def get_info() -> Dict[str, Any]:
+    """Get information on the current state of the database, refreshed at most every INFO_TTL seconds."""
+    global _info_cache
+    now = time.monotonic()
+    if _info_cache is not None and now < _info_cache[0]:
+        return _info_cache[1]
+
+    response = load_info()
+    if 'error' not in response['info']:
+        _info_cache = (now + INFO_TTL, response)
+    return response
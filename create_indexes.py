@@ -0,0 +1,33 @@
+"""
+This script creates the indexes used by the API queries on the Crocdb SQLite database.
+The API opens the database read-only, so this has to be run once on the database file after it is built or updated.
+"""
+import sqlite3
+import os
+import sys
+
+DB_PATH = os.path.join(os.path.dirname(
+    os.path.realpath(__file__)), 'db', 'roms.db')
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_entries_platform ON entries(platform)",
+    "CREATE INDEX IF NOT EXISTS idx_entries_rom_id ON entries(rom_id)",
+    "CREATE INDEX IF NOT EXISTS idx_regions_entries_entry ON regions_entries(entry, region)",
+    "CREATE INDEX IF NOT EXISTS idx_links_entry ON links(entry)"
+]
+
+
+def create_indexes(db_path: str) -> None:
+    """Create the missing indexes and refresh the statistics used by the query planner."""
+    con = sqlite3.connect(db_path)
+    try:
+        for statement in INDEXES:
+            con.execute(statement)
+        con.execute("ANALYZE")
+        con.commit()
+    finally:
+        con.close()
+
+
+if __name__ == '__main__':
+    create_indexes(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)